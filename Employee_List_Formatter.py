@@ -2,84 +2,229 @@
 # Streamlit app: paste raw JSON -> renders "department_employees" as an Employee Phone Number Directory
 
 import json
-import re
+from dataclasses import dataclass
+from functools import lru_cache
 import streamlit as st
 
+try:
+    from orjson import JSONDecodeError as _OrjsonDecodeError
+    from orjson import loads as _orjson_loads
+
+    def _jloads(raw):
+        try:
+            return _orjson_loads(raw)
+        except _OrjsonDecodeError:
+            # orjson rejects NaN/Infinity, which json.loads accepts; genuinely invalid input
+            # raises json.JSONDecodeError from the retry, same as before
+            return json.loads(raw)
+
+except ImportError:
+    from json import loads as _jloads
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Batches at least this large use the Numba kernel; the first one in a process pays its one-time JIT compile
+_NUMBA_MIN_BATCH = 10_000
+
+# Pasted payloads above this size are rejected before parsing; larger files go through the uploader
+MAX_JSON_BYTES = 5 * 1024 * 1024
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+# Cached results are shared by every session, so keep only a few recent payloads
+_CACHE_MAX_ENTRIES = 16
+_CACHE_TTL = "1h"
+
+
+class _KeepDigits(dict):
+    # str.translate table: deletes every non-digit; entries beyond Latin-1 are filled in on first use
+    def __missing__(self, cp: int):
+        self[cp] = kept = cp if chr(cp).isdecimal() else None
+        return kept
+
+
+_KEEP_DIGITS = _KeepDigits((cp, cp if chr(cp).isdecimal() else None) for cp in range(256))
+_ASCII_NON_DIGITS = bytes(b for b in range(128) if not 48 <= b <= 57)
+
 
 def digits_only(s: str) -> str:
-    return re.sub(r"\D+", "", s or "")
+    if not s:
+        return ""
+    if s.isascii():
+        # bytes.translate with a delete set skips the per-character mapping lookups
+        return s.encode("ascii").translate(None, _ASCII_NON_DIGITS).decode("ascii")
+    return s.translate(_KEEP_DIGITS)
 
 
+@lru_cache(maxsize=4096)
 def format_us_phone(raw: str) -> str:
+    if not raw:
+        return ""
+    if len(raw) < 10:
+        # Too short to hold ten digits
+        return raw.strip()
     d = digits_only(raw)
-    if len(d) == 10:
-        return f"({d[0:3]}) {d[3:6]}-{d[6:10]}"
-    if len(d) == 11 and d.startswith("1"):
+    if len(d) == 11 and d[0] == "1":
         d = d[1:]
-        return f"({d[0:3]}) {d[3:6]}-{d[6:10]}"
-    return (raw or "").strip()
+    elif len(d) != 10:
+        return raw.strip()
+    return f"({d[:3]}) {d[3:6]}-{d[6:]}"
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _scan_us_phones(buf, offsets):
+        # For each buf[offsets[i]:offsets[i + 1]] slice, keep the ASCII digits and flag
+        # slices holding exactly 10 digits, or 11 with a leading "1"
+        n = offsets.shape[0] - 1
+        digits = np.zeros((n, 10), dtype=np.uint8)
+        ok = np.zeros(n, dtype=np.bool_)
+        tmp = np.zeros(11, dtype=np.uint8)
+        for i in range(n):
+            count = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                c = buf[j]
+                if 48 <= c <= 57:
+                    if count == 11:
+                        count = 12
+                        break
+                    tmp[count] = c
+                    count += 1
+            if count == 10:
+                digits[i, :] = tmp[:10]
+                ok[i] = True
+            elif count == 11 and tmp[0] == 49:
+                digits[i, :] = tmp[1:]
+                ok[i] = True
+        return digits, ok
+
+
+def _format_phones_numba(raws: list[str]) -> list[str]:
+    lengths = np.fromiter(map(len, raws), dtype=np.int64, count=len(raws))
+    offsets = np.zeros(len(raws) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    buf = np.frombuffer("".join(raws).encode("ascii"), dtype=np.uint8)
+    digits, ok = _scan_us_phones(buf, offsets)
+    flat = digits.tobytes().decode("ascii")
+
+    out = []
+    for i, raw in enumerate(raws):
+        if ok[i]:
+            d = flat[i * 10 : i * 10 + 10]
+            out.append(f"({d[0:3]}) {d[3:6]}-{d[6:10]}")
+        else:
+            out.append(raw.strip())
+    return out
+
+
+def format_us_phones(raws: list[str]) -> list[str]:
+    # Batch form of format_us_phone; very large ASCII batches go through the Numba kernel
+    # when it is installed (non-ASCII digits need the Unicode-aware Python path)
+    if njit is None or len(raws) < _NUMBA_MIN_BATCH or not all(map(str.isascii, raws)):
+        return list(map(format_us_phone, raws))
+    return _format_phones_numba(raws)
 
 
-def normalize(s: str) -> str:
-    return (s or "").strip()
+def _as_text(v) -> str:
+    # Slow-path field read: missing/null become "", other non-strings (e.g. numeric phones) are stringified
+    return "" if v is None else str(v).strip()
 
 
-def to_entries(payload: dict) -> list[dict]:
+@dataclass(slots=True, frozen=True)
+class Entry:
+    name: str
+    position: str
+    office_raw: str
+    office_fmt: str
+    email: str
+
+
+def to_entries(payload: dict, dedupe: bool = True) -> tuple[list[Entry], dict[str, list[str]]]:
     dept_emps = payload.get("department_employees", []) or []
-    entries = []
+    # Deduplicate exact duplicates while preserving order, unless the caller vouches for the input
+    seen = set()
+    office_raws = []
+    # Table columns are filled in the loop so the UI never has to transpose rows;
+    # phone formatting runs once over the whole batch afterwards
+    columns = {"Name": [], "Position": [], "Office": [], "Email": []}
+    names, positions, _, emails = columns.values()
+
+    # Bind hot-loop callables to locals to skip global/attribute lookups per employee
+    _seen_add = seen.add
+    _names_append = names.append
+    _positions_append = positions.append
+    _office_raws_append = office_raws.append
+    _emails_append = emails.append
 
     for block in dept_emps:
         employees = (block or {}).get("employees", []) or []
         for emp in employees:
-            name = normalize(emp.get("contact_name", ""))
+            try:
+                # Fast path for well-formed employees: every field present and a string
+                name = emp["contact_name"].strip()
+                position = emp["employee_position"].strip()
+                office_raw = emp["office_number"].strip()
+                email = emp["email_address"].strip()
+            except (KeyError, AttributeError, TypeError):
+                name = _as_text(emp.get("contact_name"))
+                position = _as_text(emp.get("employee_position"))
+                office_raw = _as_text(emp.get("office_number"))
+                email = _as_text(emp.get("email_address"))
             if not name:
                 continue
 
-            position = normalize(emp.get("employee_position", ""))
-            office_raw = normalize(emp.get("office_number", ""))
-            email = normalize(emp.get("email_address", ""))
-
-            entries.append(
-                {
-                    "name": name,
-                    "position": position,
-                    "office_raw": office_raw,
-                    "office_fmt": format_us_phone(office_raw),
-                    "email": email,
-                }
-            )
-
-    # Deduplicate exact duplicates while preserving order
-    seen = set()
-    deduped = []
-    for e in entries:
-        key = (e["name"], e["position"], e["office_raw"], e["email"])
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(e)
+            if dedupe:
+                key = (name, position, office_raw, email)
+                if key in seen:
+                    continue
+                _seen_add(key)
+            _names_append(name)
+            _positions_append(position)
+            _office_raws_append(office_raw)
+            _emails_append(email)
 
-    return deduped
+    columns["Office"] = offices_fmt = format_us_phones(office_raws)
+    entries = list(map(Entry, names, positions, office_raws, offices_fmt, emails))
+    return entries, columns
 
 
-def render_directory(entries: list[dict]) -> str:
-    lines = []
-    lines.append("## Employee Phone Number Directory")
-    lines.append("")
+def render_directory(entries: list[Entry]) -> str:
+    # Every entry contributes only non-empty lines plus one blank separator,
+    # so the output never has runs of blank lines to clean up afterwards
+    lines = ["## Employee Phone Number Directory", ""]
 
     for e in entries:
-        lines.append("" + e["name"])
-        if e["position"]:
-            lines.append(e["position"])
-        if e["office_fmt"]:
-            lines.append("Office: " + e["office_fmt"])
-        if e["email"]:
-            lines.append("Email: " + e["email"])
+        lines.append(e.name)
+        if e.position:
+            lines.append(e.position)
+        if e.office_fmt:
+            lines.append("Office: " + e.office_fmt)
+        if e.email:
+            lines.append("Email: " + e.email)
         lines.append("")
 
-    out = "\n".join(lines)
-    out = re.sub(r"\n{3,}", "\n\n", out).rstrip() + "\n"
-    return out
+    return "\n".join(lines).rstrip() + "\n"
+
+
+@st.cache_data(show_spinner=False, max_entries=_CACHE_MAX_ENTRIES, ttl=_CACHE_TTL)
+def build_directory(raw: bytes, dedupe: bool = True) -> tuple[list[Entry], dict[str, list[str]], str, bytes]:
+    # Keyed on the raw UTF-8 JSON, so reruns with unchanged input skip parsing, rendering
+    # and encoding the download payload
+    payload = _jloads(raw)
+    entries, columns = to_entries(payload, dedupe=dedupe)
+    directory_md = render_directory(entries)
+    return entries, columns, directory_md, directory_md.encode("utf-8")
+
+
+@st.cache_data(show_spinner=False, max_entries=_CACHE_MAX_ENTRIES, ttl=_CACHE_TTL)
+def pretty_json(raw: bytes) -> str:
+    # Cached per raw payload so toggling or rerunning doesn't re-serialize it.
+    # Always stdlib: orjson would print NaN as null, reformat floats and round big ints.
+    return json.dumps(json.loads(raw), indent=2, ensure_ascii=False)
 
 
 st.set_page_config(page_title="Employee Directory Builder", layout="wide")
@@ -87,27 +232,51 @@ st.title("Employee Directory Builder")
 st.caption("Paste the raw JSON payload. The app extracts `department_employees` and formats the directory.")
 
 raw = st.text_area("Raw JSON", value="", height=320, placeholder="Paste the full JSON here...")
+uploaded = st.file_uploader("Or upload a JSON file", type=["json"])
+pretty = st.checkbox("Pretty-print JSON", value=False)
+show_table = st.checkbox("Show table", value=False)
+trust_input = st.checkbox("Trust input (skip duplicate removal)", value=False)
 
 if st.button("Generate Directory", type="primary"):
+    if uploaded is not None and raw.strip():
+        st.error("Both pasted JSON and an uploaded file were provided; clear one of them.")
+        st.stop()
+
+    if uploaded is not None:
+        if uploaded.size > MAX_UPLOAD_BYTES:
+            st.error(f"Uploaded file is too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)} MB).")
+            st.stop()
+        raw_bytes = uploaded.getvalue()
+    else:
+        raw_bytes = raw.encode("utf-8")
+        if len(raw_bytes) > MAX_JSON_BYTES:
+            st.error("Payload too large; please upload a file instead.")
+            st.stop()
+
     try:
-        payload = json.loads(raw)
-    except json.JSONDecodeError as e:
+        entries, columns, directory_md, directory_bytes = build_directory(raw_bytes, dedupe=not trust_input)
+    except ValueError as e:
+        # Covers json.JSONDecodeError and UnicodeDecodeError from non-UTF-8 uploads
         st.error("Invalid JSON: " + str(e))
         st.stop()
 
-    entries = to_entries(payload)
     if not entries:
         st.warning("No employees found under `department_employees`.")
         st.stop()
 
-    directory_md = render_directory(entries)
-
     st.subheader("Directory Output")
     st.code(directory_md, language="markdown")
 
+    if pretty:
+        st.subheader("Formatted JSON")
+        st.code(pretty_json(raw_bytes), language="json")
+
+    if show_table:
+        st.dataframe(columns, width="stretch", hide_index=True)
+
     st.download_button(
         "Download directory.md",
-        data=directory_md.encode("utf-8"),
+        data=directory_bytes,
         file_name="directory.md",
         mime="text/markdown",
     )